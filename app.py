@@ -1,10 +1,16 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
+from flask.json.provider import JSONProvider
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import logging
+import orjson
 import os
 from dotenv import load_dotenv
 from llm import GeoLLM
-from tools import GISTools
+from tools import GISTools, COUNTRY_RE
 import json
+import numpy as np
+import re
 from shapely.geometry import Polygon
 
 # Configure logging
@@ -21,16 +27,76 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 logger.info("Environment variables loaded")
 
-# Initialize LLM and GIS tools
-try:
+# LLM and GIS tools are constructed lazily on first use, so importing the
+# app (worker boot, fork) stays cheap; gunicorn.conf.py warms them per worker
+@lru_cache(maxsize=1)
+def get_geo_llm():
+    """Get the shared GeoLLM instance, constructing it on first use"""
     geo_llm = GeoLLM()
+    logger.info("GeoLLM initialized successfully")
+    return geo_llm
+
+
+@lru_cache(maxsize=1)
+def get_gis_tools():
+    """Get the shared GISTools instance, constructing it on first use"""
     gis_tools = GISTools()
-    logger.info("GeoLLM and GISTools initialized successfully")
-except Exception as e:
-    logger.error(f"Error initializing components: {str(e)}", exc_info=True)
-    raise
+    logger.info("GISTools initialized successfully")
+    return gis_tools
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for fast (Geo)JSON encoding"""
+
+    def dumps(self, obj, **kwargs):
+        # OPT_SERIALIZE_NUMPY lets numpy arrays/scalars serialize directly,
+        # so coordinate arrays don't need a .tolist() round-trip first
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# Shared pool for running independent I/O-bound tool calls concurrently
+_TOOL_POOL = ThreadPoolExecutor(max_workers=32)
+
+# Countries well outside India's region: /api/geocode rejects queries naming
+# them before burning a rate-limited Nominatim round trip
+_FOREIGN_COUNTRY_RE = re.compile(
+    r"\b(usa|united states|uk|united kingdom|england|france|germany|italy|"
+    r"spain|china|japan|russia|australia|canada|brazil|mexico|indonesia|"
+    r"south africa)\b",
+    re.IGNORECASE
+)
+
+
+def _tool_mapping():
+    """Map public tool names to GISTools methods"""
+    gis_tools = get_gis_tools()
+    return {
+        'geocode': gis_tools.geocode_location,
+        'buffer': gis_tools.create_buffer,
+        'calculate_area': gis_tools.calculate_area
+    }
+
+
+def _format_tool_result(tool_name, result, params):
+    """Convert special tool results (shapely geometries) into GeoJSON"""
+    if tool_name == 'buffer' and result is not None and isinstance(result, Polygon):
+        buffer_coords = np.asarray(result.exterior.coords)[:, :2].tolist()
+        return {
+            'type': 'Feature',
+            'properties': {
+                'distance_km': params.get('distance_km', 5)
+            },
+            'geometry': {
+                'type': 'Polygon',
+                'coordinates': [buffer_coords]
+            }
+        }
+    return result
 
 @app.route('/')
 def index():
@@ -38,24 +104,42 @@ def index():
     return render_template('index.html')
 
 @app.route('/api/chat', methods=['POST'])
-def chat():
+async def chat():
     logger.info("Chat endpoint called")
     data = request.get_json(silent=True) or {}
     user_query = data.get('query', '')
-    
+
     if not user_query:
         logger.warning("Empty query received")
         return jsonify({'error': 'No query provided'}), 400
-    
-    logger.info(f"Processing query: {user_query}")
-    
+
+    logger.info("Processing query: %s", user_query)
+
+    # Opt-in Server-Sent Events streaming: deltas are forwarded as Gemini
+    # produces them, dropping perceived latency to time-to-first-token
+    if data.get('stream'):
+        # Construct the instance before building the SSE response, so init
+        # failures keep the endpoint's JSON error contract while mid-stream
+        # errors are yielded as SSE frames
+        try:
+            geo_llm = get_geo_llm()
+        except Exception as e:
+            logger.error("Error generating response: %s", str(e), exc_info=True)
+            return jsonify({'error': str(e)}), 500
+
+        def event_stream():
+            for chunk in geo_llm.generate_response_stream(user_query):
+                yield f"data: {json.dumps({'delta': chunk})}\n\n"
+            yield "data: [DONE]\n\n"
+        return Response(stream_with_context(event_stream()), mimetype='text/event-stream')
+
     try:
         logger.info("Generating response")
-        response = geo_llm.generate_response(user_query)
+        response = await get_geo_llm().generate_response_async(user_query)
         logger.info("Response generated")
         return jsonify({'response': response})
     except Exception as e:
-        logger.error(f"Error generating response: {str(e)}", exc_info=True)
+        logger.error("Error generating response: %s", str(e), exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/geocode', methods=['POST'])
@@ -66,13 +150,19 @@ def geocode():
     
     if not location_name:
         return jsonify({'error': 'No location provided'}), 400
-    
+
+    # Queries naming a clearly foreign country would fail the bounding-box
+    # check anyway; reject them before the rate-limited Nominatim round trip
+    foreign = _FOREIGN_COUNTRY_RE.search(location_name)
+    if foreign:
+        return jsonify({'error': f"Location appears to be outside India's geographic region: {foreign.group(0)}"}), 400
+
     # Prioritize Indian locations if not already specified
-    if not any(country in location_name.lower() for country in ['india', 'pakistan', 'bangladesh', 'nepal', 'bhutan', 'sri lanka', 'myanmar']):
+    if not COUNTRY_RE.search(location_name):
         location_name = f"{location_name}, India"
     
     try:
-        coordinates = gis_tools.geocode_location(location_name)
+        coordinates = get_gis_tools().geocode_location(location_name)
         if coordinates:
             # Validate that coordinates are within or near India's bounding box
             lat, lon = coordinates
@@ -102,7 +192,7 @@ def geocode():
             logger.warning(error_message)
             return jsonify({'error': error_message}), 404
     except Exception as e:
-        logger.error(f"Error geocoding location: {str(e)}", exc_info=True)
+        logger.error("Error geocoding location: %s", str(e), exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/buffer', methods=['POST'])
@@ -117,10 +207,11 @@ def create_buffer():
         return jsonify({'error': 'Latitude and longitude are required'}), 400
     
     try:
-        buffer_geom = gis_tools.create_buffer(lat, lon, distance_km)
+        buffer_geom = get_gis_tools().create_buffer(lat, lon, distance_km)
         if buffer_geom is not None and isinstance(buffer_geom, Polygon):
-            # Convert to GeoJSON for frontend use
-            buffer_coords = list(buffer_geom.exterior.coords)
+            # Convert to GeoJSON for frontend use; pull the exterior ring as
+            # one numpy array instead of iterating vertices in Python
+            buffer_coords = np.asarray(buffer_geom.exterior.coords)[:, :2].tolist()
             geojson = {
                 'type': 'Feature',
                 'properties': {
@@ -128,14 +219,14 @@ def create_buffer():
                 },
                 'geometry': {
                     'type': 'Polygon',
-                    'coordinates': [[[coord[0], coord[1]] for coord in buffer_coords]]
+                    'coordinates': [buffer_coords]
                 }
             }
             return jsonify(geojson)
         else:
             return jsonify({'error': 'Could not create buffer'}), 500
     except Exception as e:
-        logger.error(f"Error creating buffer: {str(e)}", exc_info=True)
+        logger.error("Error creating buffer: %s", str(e), exc_info=True)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/tools', methods=['POST'])
@@ -149,43 +240,55 @@ def use_tool():
         return jsonify({'error': 'No tool specified'}), 400
     
     try:
-        # Map tool names to methods
-        tool_mapping = {
-            'geocode': gis_tools.geocode_location,
-            'buffer': gis_tools.create_buffer,
-            'calculate_area': gis_tools.calculate_area
-        }
-        
+        tool_mapping = _tool_mapping()
+
         if tool_name not in tool_mapping:
             return jsonify({'error': f'Unknown tool: {tool_name}'}), 400
-            
+
         # Call the appropriate tool with parameters
         tool_func = tool_mapping[tool_name]
         result = tool_func(**params)
-        
-        # Process special result types
-        if tool_name == 'buffer' and result is not None and isinstance(result, Polygon):
-            # Convert Shapely geometry to GeoJSON
-            buffer_coords = list(result.exterior.coords)
-            result = {
-                'type': 'Feature',
-                'properties': {
-                    'distance_km': params.get('distance_km', 5)
-                },
-                'geometry': {
-                    'type': 'Polygon',
-                    'coordinates': [[[coord[0], coord[1]] for coord in buffer_coords]]
-                }
-            }
-        
+
         return jsonify({
             'tool': tool_name,
-            'result': result
+            'result': _format_tool_result(tool_name, result, params)
         })
     except Exception as e:
-        logger.error(f"Error using tool {tool_name}: {str(e)}", exc_info=True)
+        logger.error("Error using tool %s: %s", tool_name, str(e), exc_info=True)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/tools/batch', methods=['POST'])
+def use_tools_batch():
+    """API endpoint to run several independent GIS tool calls concurrently"""
+    data = request.get_json(silent=True) or {}
+    calls = data.get('calls', [])
+
+    if not isinstance(calls, list) or not calls:
+        return jsonify({'error': 'No tool calls provided'}), 400
+
+    tool_mapping = _tool_mapping()
+
+    def run_call(call):
+        if not isinstance(call, dict):
+            return {'error': 'Invalid tool call; expected an object with "tool" and "params"'}
+        tool_name = call.get('tool', '')
+        params = call.get('params', {})
+        if tool_name not in tool_mapping:
+            return {'tool': tool_name, 'error': f'Unknown tool: {tool_name}'}
+        try:
+            result = tool_mapping[tool_name](**params)
+            return {'tool': tool_name, 'result': _format_tool_result(tool_name, result, params)}
+        except Exception as e:
+            logger.error("Error using tool %s: %s", tool_name, str(e), exc_info=True)
+            return {'tool': tool_name, 'error': str(e)}
+
+    # Independent I/O-bound calls (geocode, buffer) run concurrently on the
+    # shared pool; results come back in input order
+    futures = [_TOOL_POOL.submit(run_call, call) for call in calls]
+    results = [future.result() for future in futures]
+
+    return jsonify({'results': results})
+
 if __name__ == '__main__':
     logger.info("Starting Flask application")
     app.run(debug=True)
\ No newline at end of file
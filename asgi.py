@@ -0,0 +1,13 @@
+"""
+ASGI entry point for running the app under an async server, e.g.:
+
+    uvicorn asgi:app
+
+A single async worker can then keep many chat requests in flight during
+Gemini's multi-second latency instead of blocking a thread per request.
+"""
+from asgiref.wsgi import WsgiToAsgi
+
+from app import app as wsgi_app
+
+app = WsgiToAsgi(wsgi_app)
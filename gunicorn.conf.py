@@ -0,0 +1,22 @@
+import multiprocessing
+
+# All API endpoints are dominated by external blocking I/O (Gemini, Nominatim),
+# so run cooperative gevent workers: greenlets yield during socket I/O and each
+# worker can service many in-flight requests instead of one. The gevent worker
+# class monkey-patches the stdlib on worker init, making the existing blocking
+# HTTP calls cooperative without code changes.
+worker_class = "gevent"
+workers = multiprocessing.cpu_count() * 2 + 1
+worker_connections = 1000
+bind = "0.0.0.0:5000"
+
+
+def post_worker_init(worker):
+    # Warm the lazy GeoLLM/GISTools singletons once per worker, so the first
+    # request doesn't pay for model and index construction. This must run in
+    # post_worker_init, not post_fork: gunicorn fires post_fork before the
+    # gevent worker monkey-patches the stdlib, so importing the app there
+    # would load ssl/urllib3 unpatched and break cooperative geocode I/O.
+    from app import get_geo_llm, get_gis_tools
+    get_geo_llm()
+    get_gis_tools()
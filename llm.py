@@ -1,20 +1,62 @@
 import google.generativeai as genai
+import diskcache
+import hashlib
 import os
 import logging
 from dotenv import load_dotenv
 from tools import GISTools
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Optional semantic-cache dependencies; the cache is disabled if missing
+try:
+    import faiss
+    from sentence_transformers import SentenceTransformer
+    SEMANTIC_CACHE_AVAILABLE = True
+except ImportError:
+    SEMANTIC_CACHE_AVAILABLE = False
+
+# Logging is configured by the application entry point (app.py)
 logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+# Minimum cosine similarity for a semantic cache hit
+SEMANTIC_SIMILARITY_THRESHOLD = 0.92
+
+# How long exact-match responses stay cached (seconds)
+RESPONSE_CACHE_TTL = 86400
+
+# System prompt template for geospatial analysis; split once at class
+# construction so per-request assembly is plain string concatenation
+_SYSTEM_PROMPT_TEMPLATE = """
+        You are an advanced geospatial analysis assistant for ISRO (Indian Space Research Organisation).
+        Your primary role is to answer geospatial questions about India. Your response style depends on the user's query type:
+
+        1.  **For specific Point-of-Interest (POI) or direct location queries** (e.g., "Where is the nearest hospital?", "Find schools in Koramangala", "What is in this area?"): Provide a direct, helpful answer using your general knowledge. You can and should name specific places or landmarks. Frame the answer naturally.
+
+        2.  **For complex analytical or "how-to" queries** (e.g., "How would I identify flood zones?", "Analyze urban growth in Hyderabad"): Provide a concise, direct answer that explains the outcome or methodology of a hypothetical GIS analysis.
+
+        ---
+        IMPORTANT RULES FOR ALL RESPONSES:
+        - Your entire focus is on INDIA. All locations, data, and context must be Indian.
+        - If a location is ambiguous, assume it's in India.
+        - DO NOT use phrases like "Based on my analysis," "As an AI," or "I lack the capability." Directly provide the answer.
+        - DO NOT show your step-by-step reasoning or use numbered lists in the final answer.
+        - NEVER use coordinates or examples from outside of India.
+        ---
+
+        REFERENCE DATA AND TOOLS FOR YOUR KNOWLEDGE BASE (for analytical queries):
+        - Remote Sensing Data: IRS, Cartosat, ResourceSat, RISAT, Oceansat, INSAT/GSAT.
+        - GIS Platforms: QGIS, Bhuvan, VEDAS, NRSC Open Data Archive, MOSDAC.
+        - Indian Data Sources: Census of India, Survey of India, India WRIS, NBSS&LUP soil maps, Forest Survey of India, IMD climate data.
+        - Analysis Libraries: GeoPandas, Rasterio, Folium.
+        ---
+        Question: {query}
+
+        Answer:
+        """
+
 class GeoLLM:
     """
     LLM utility class for geospatial analysis using Gemini
@@ -40,82 +82,239 @@ class GeoLLM:
         logger.info("GeoLLM initialized with Gemini API (gemini-2.0-flash-exp)")
         self.gis_tools = GISTools()
         logger.info("GISTools initialized")
-        
+
+        # Pre-split the prompt template so building a prompt is a single
+        # concatenation instead of re-parsing the template with .format()
+        self._prompt_prefix, self._prompt_suffix = _SYSTEM_PROMPT_TEMPLATE.split("{query}")
+
+        # Exact-match response cache, persisted on disk and keyed on a hash
+        # of the literal query; checked before the semantic cache
+        self._response_cache = diskcache.Cache("./.llm_cache")
+
+        # Semantic response cache: embeds queries locally and reuses cached
+        # answers for near-duplicate prompts, skipping the Gemini round trip
+        self._semantic_index = None
+        self._semantic_entries = []
+        if SEMANTIC_CACHE_AVAILABLE:
+            try:
+                self._embedder = SentenceTransformer('all-MiniLM-L6-v2')
+                self._semantic_index = faiss.IndexFlatIP(
+                    self._embedder.get_sentence_embedding_dimension()
+                )
+                logger.info("Semantic response cache enabled")
+            except Exception as e:
+                logger.warning("Could not initialize semantic cache: %s", str(e))
+                self._semantic_index = None
+        else:
+            logger.info("faiss/sentence-transformers not installed; semantic cache disabled")
+
+    def _semantic_lookup(self, query):
+        """
+        Look up a cached response for a semantically similar query
+
+        Args:
+            query (str): User's geospatial query
+
+        Returns:
+            str: Cached response, or None if no close enough match
+        """
+        if self._semantic_index is None or self._semantic_index.ntotal == 0:
+            return None
+        emb = self._embedder.encode([query], normalize_embeddings=True)
+        distances, indices = self._semantic_index.search(emb, 1)
+        if distances[0, 0] > SEMANTIC_SIMILARITY_THRESHOLD:
+            cached_query, cached_response = self._semantic_entries[indices[0, 0]]
+            logger.info("Semantic cache hit (similarity %.3f): '%s' matched '%s'", distances[0, 0], query, cached_query)
+            return cached_response
+        return None
+
+    def _semantic_store(self, query, response):
+        """
+        Store a generated response in the semantic cache
+
+        Args:
+            query (str): User's geospatial query
+            response (str): Generated response text
+        """
+        if self._semantic_index is None:
+            return
+        emb = self._embedder.encode([query], normalize_embeddings=True)
+        self._semantic_index.add(emb)
+        self._semantic_entries.append((query, response))
+
     def get_system_prompt(self):
         """
-        Get the system prompt for geospatial analysis
-        
+        Get the system prompt template for geospatial analysis
+
         Returns:
-            str: System prompt
+            str: System prompt template
         """
-        return """
-        You are an advanced geospatial analysis assistant for ISRO (Indian Space Research Organisation).
-        Your primary role is to answer geospatial questions about India. Your response style depends on the user's query type:
+        return _SYSTEM_PROMPT_TEMPLATE
 
-        1.  **For specific Point-of-Interest (POI) or direct location queries** (e.g., "Where is the nearest hospital?", "Find schools in Koramangala", "What is in this area?"): Provide a direct, helpful answer using your general knowledge. You can and should name specific places or landmarks. Frame the answer naturally.
 
-        2.  **For complex analytical or "how-to" queries** (e.g., "How would I identify flood zones?", "Analyze urban growth in Hyderabad"): Provide a concise, direct answer that explains the outcome or methodology of a hypothetical GIS analysis.
+    @staticmethod
+    def _cache_key(query):
+        """
+        Build the exact-match cache key for a query
 
-        ---
-        IMPORTANT RULES FOR ALL RESPONSES:
-        - Your entire focus is on INDIA. All locations, data, and context must be Indian.
-        - If a location is ambiguous, assume it's in India.
-        - DO NOT use phrases like "Based on my analysis," "As an AI," or "I lack the capability." Directly provide the answer.
-        - DO NOT show your step-by-step reasoning or use numbered lists in the final answer.
-        - NEVER use coordinates or examples from outside of India.
-        ---
-        
-        REFERENCE DATA AND TOOLS FOR YOUR KNOWLEDGE BASE (for analytical queries):
-        - Remote Sensing Data: IRS, Cartosat, ResourceSat, RISAT, Oceansat, INSAT/GSAT.
-        - GIS Platforms: QGIS, Bhuvan, VEDAS, NRSC Open Data Archive, MOSDAC.
-        - Indian Data Sources: Census of India, Survey of India, India WRIS, NBSS&LUP soil maps, Forest Survey of India, IMD climate data.
-        - Analysis Libraries: GeoPandas, Rasterio, Folium.
-        ---
-        Question: {query}
-        
-        Answer:
+        Args:
+            query (str): User's geospatial query
+
+        Returns:
+            str: Hex digest key
         """
-        
+        return hashlib.blake2b(query.encode(), digest_size=16).hexdigest()
+
+    def _cached_response(self, query):
+        """
+        Check the exact-match and semantic cache tiers for a query
+
+        Args:
+            query (str): User's geospatial query
+
+        Returns:
+            str: Cached response, or None on a miss in both tiers
+        """
+        cached_response = self._response_cache.get(self._cache_key(query))
+        if cached_response is not None:
+            logger.info("Exact-match cache hit for query.")
+            return cached_response
+        return self._semantic_lookup(query)
+
     def generate_response(self, query):
         """
         Generate a response for a geospatial query
-        
+
         Args:
             query (str): User's geospatial query
-            
+
         Returns:
             str: Generated response
         """
         try:
-            prompt = self.get_system_prompt().format(query=query)
+            cached_response = self._cached_response(query)
+            if cached_response is not None:
+                return cached_response
+
+            prompt = self._prompt_prefix + query + self._prompt_suffix
             logger.info("Sending request to Gemini API.")
-            
+
             response = self.model.generate_content(prompt)
             logger.info("Response received from Gemini API.")
 
-            if response.prompt_feedback and response.prompt_feedback.block_reason:
-                block_reason = response.prompt_feedback.block_reason.name
-                logger.error(f"Prompt was blocked by the API. Reason: {block_reason}")
-                return f"Error: Your query was blocked by the content safety filter. Reason: {block_reason}. Please rephrase your question."
-
-            if response.candidates:
-                first_candidate = response.candidates[0]
-                if first_candidate.content and first_candidate.content.parts:
-                    generated_text = "".join(part.text for part in first_candidate.content.parts)
-                    if generated_text:
-                        logger.info("Successfully extracted text from response.")
-                        return generated_text
-                    else:
-                        logger.warning("API response received, but the generated text is empty.")
-                        return "Error: The model returned an empty response. Please try rephrasing your question."
-                else:
-                    finish_reason = first_candidate.finish_reason.name if hasattr(first_candidate, 'finish_reason') and first_candidate.finish_reason else "UNKNOWN"
-                    logger.error(f"API response has no content parts. Finish reason: {finish_reason}")
-                    return f"Error: The model could not generate a response. Reason: {finish_reason}. This may be due to safety filters."
+            return self._process_response(query, response)
+
+        except Exception as e:
+            logger.error("Error generating response: %s", str(e), exc_info=True)
+            return f"Error: An unexpected error occurred while communicating with the AI model. Please check the backend logs. Details: {str(e)}"
+
+    async def generate_response_async(self, query):
+        """
+        Async variant of generate_response
+
+        Awaits the Gemini call instead of blocking, so a single worker can
+        service many in-flight chat requests during the model's latency.
+
+        Args:
+            query (str): User's geospatial query
+
+        Returns:
+            str: Generated response
+        """
+        try:
+            cached_response = self._cached_response(query)
+            if cached_response is not None:
+                return cached_response
+
+            prompt = self._prompt_prefix + query + self._prompt_suffix
+            logger.info("Sending request to Gemini API.")
+
+            response = await self.model.generate_content_async(prompt)
+            logger.info("Response received from Gemini API.")
+
+            return self._process_response(query, response)
+
+        except Exception as e:
+            logger.error("Error generating response: %s", str(e), exc_info=True)
+            return f"Error: An unexpected error occurred while communicating with the AI model. Please check the backend logs. Details: {str(e)}"
+
+    def generate_response_stream(self, query):
+        """
+        Stream a response for a geospatial query chunk by chunk
+
+        Yields text deltas as Gemini produces them, so callers can forward
+        tokens as soon as they arrive; a cached answer is yielded as a single
+        chunk. The full text is cached once the stream completes.
+
+        Args:
+            query (str): User's geospatial query
+
+        Yields:
+            str: Response text chunks
+        """
+        try:
+            cached_response = self._cached_response(query)
+            if cached_response is not None:
+                yield cached_response
+                return
+
+            prompt = self._prompt_prefix + query + self._prompt_suffix
+            logger.info("Sending streaming request to Gemini API.")
+
+            response = self.model.generate_content(prompt, stream=True)
+
+            chunks = []
+            for chunk in response:
+                chunk_text = "".join(part.text for part in chunk.parts)
+                if chunk_text:
+                    chunks.append(chunk_text)
+                    yield chunk_text
+
+            generated_text = "".join(chunks)
+            if generated_text:
+                logger.info("Streaming response completed.")
+                self._response_cache.set(self._cache_key(query), generated_text, expire=RESPONSE_CACHE_TTL)
+                self._semantic_store(query, generated_text)
             else:
-                logger.error("No candidates found in the API response.")
-                return "Error: Received an invalid response from the AI model (no candidates)."
+                logger.warning("Streaming response completed without any text.")
+                yield "Error: The model returned an empty response. Please try rephrasing your question."
 
         except Exception as e:
-            logger.error(f"Error generating response: {str(e)}", exc_info=True)
-            return f"Error: An unexpected error occurred while communicating with the AI model. Please check the backend logs. Details: {str(e)}"
\ No newline at end of file
+            logger.error("Error streaming response: %s", str(e), exc_info=True)
+            yield f"Error: An unexpected error occurred while communicating with the AI model. Please check the backend logs. Details: {str(e)}"
+
+    def _process_response(self, query, response):
+        """
+        Extract the generated text from a Gemini response and cache it
+
+        Args:
+            query (str): User's geospatial query
+            response: Gemini API response object
+
+        Returns:
+            str: Generated response text, or a user-facing error string
+        """
+        if response.prompt_feedback and response.prompt_feedback.block_reason:
+            block_reason = response.prompt_feedback.block_reason.name
+            logger.error("Prompt was blocked by the API. Reason: %s", block_reason)
+            return f"Error: Your query was blocked by the content safety filter. Reason: {block_reason}. Please rephrase your question."
+
+        if response.candidates:
+            first_candidate = response.candidates[0]
+            if first_candidate.content and first_candidate.content.parts:
+                generated_text = "".join(part.text for part in first_candidate.content.parts)
+                if generated_text:
+                    logger.info("Successfully extracted text from response.")
+                    self._response_cache.set(self._cache_key(query), generated_text, expire=RESPONSE_CACHE_TTL)
+                    self._semantic_store(query, generated_text)
+                    return generated_text
+                else:
+                    logger.warning("API response received, but the generated text is empty.")
+                    return "Error: The model returned an empty response. Please try rephrasing your question."
+            else:
+                finish_reason = first_candidate.finish_reason.name if hasattr(first_candidate, 'finish_reason') and first_candidate.finish_reason else "UNKNOWN"
+                logger.error("API response has no content parts. Finish reason: %s", finish_reason)
+                return f"Error: The model could not generate a response. Reason: {finish_reason}. This may be due to safety filters."
+        else:
+            logger.error("No candidates found in the API response.")
+            return "Error: Received an invalid response from the AI model (no candidates)."
\ No newline at end of file
@@ -1,23 +1,85 @@
+# folium and rasterio are imported lazily inside the methods that need them
+# (create_map, load_raster): they are heavyweight and the request paths in
+# app.py never touch them, so keeping them out of module import keeps worker
+# boot time and per-worker memory down
 import geopandas as gpd
-import folium
-import rasterio
 import shapely
 import numpy as np
-import matplotlib.pyplot as plt
+import pyproj
 from shapely.geometry import Point, Polygon, LineString
-import contextily as ctx
+from shapely.ops import transform
 import geopy
+from geopy.adapters import RequestsAdapter
 from geopy.geocoders import Nominatim
 from geopy.extra.rate_limiter import RateLimiter
+from functools import lru_cache
 import logging
+import re
+import time
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging is configured by the application entry point (app.py)
 logger = logging.getLogger(__name__)
 
+# Countries in the region that mark a location query as already scoped;
+# compiled once so request paths avoid lowercasing and walking a list per
+# call. Shared with app.py's /api/geocode.
+COUNTRY_RE = re.compile(
+    r"\b(india|pakistan|bangladesh|nepal|bhutan|sri lanka|myanmar)\b",
+    re.IGNORECASE
+)
+
+# How long failed lookups stay in the negative cache (seconds)
+_NEGATIVE_CACHE_TTL = 3600
+
+
+class _GeocodeMiss(Exception):
+    """Raised internally when Nominatim finds no match for a query"""
+
+
+# Albers equal-area projection centred on India, used for area calculations
+_AREA_PROJ = '+proj=aea +lat_1=20 +lat_2=60 +lat_0=40 +lon_0=80 +x_0=0 +y_0=0 +ellps=WGS84 +datum=WGS84 +units=m +no_defs'
+
+
+@lru_cache(maxsize=1)
+def _area_crs():
+    """
+    Get the cached equal-area CRS for area calculations
+
+    Returns:
+        pyproj.CRS: Albers equal-area CRS
+    """
+    return pyproj.CRS.from_proj4(_AREA_PROJ)
+
+
+@lru_cache(maxsize=1)
+def _area_transformer():
+    """
+    Get the cached transformer from WGS84 into the equal-area CRS
+
+    Returns:
+        pyproj.Transformer: WGS84 -> Albers equal-area transformer
+    """
+    return pyproj.Transformer.from_crs("EPSG:4326", _area_crs(), always_xy=True)
+
+
+@lru_cache(maxsize=120)
+def _utm_transformers(zone, south):
+    """
+    Get cached forward/inverse transformers between WGS84 and a UTM zone
+
+    Args:
+        zone (int): UTM zone number
+        south (bool): True for the southern hemisphere
+
+    Returns:
+        tuple: (wgs84->utm Transformer, utm->wgs84 Transformer)
+    """
+    epsg = (32700 if south else 32600) + zone
+    forward = pyproj.Transformer.from_crs("EPSG:4326", f"EPSG:{epsg}", always_xy=True)
+    inverse = pyproj.Transformer.from_crs(f"EPSG:{epsg}", "EPSG:4326", always_xy=True)
+    return forward, inverse
+
+
 class GISTools:
     """
     Collection of GIS utility functions for spatial analysis
@@ -25,83 +87,122 @@ class GISTools:
     """
     
     def __init__(self):
-        # Configure Nominatim with better parameters
+        # Configure Nominatim with better parameters; the requests-backed
+        # adapter keeps a pooled session alive so repeated geocode calls
+        # reuse the TCP/TLS connection instead of re-handshaking
         self.geolocator = Nominatim(
-            user_agent="isro-geollm-assistant"
+            user_agent="isro-geollm-assistant",
+            adapter_factory=RequestsAdapter
         )
         # Add rate limiting to avoid hitting API limits
         self.geocode = RateLimiter(self.geolocator.geocode, min_delay_seconds=1)
+        # Per-instance cache of resolved coordinates so repeated lookups
+        # skip both the rate limiter and the Nominatim round-trip; failed
+        # lookups go into a separate TTL'd negative cache
+        self._geocode_cached = lru_cache(maxsize=4096)(self._geocode_uncached)
+        self._negative_cache = {}
         logger.info("GISTools initialized")
-    
+
     def geocode_location(self, location_name):
         """
         Convert a location name to coordinates (latitude, longitude)
-        
+
+        Results are cached on the normalized (stripped, lowercased) name,
+        so repeated lookups return without hitting Nominatim. Failed lookups
+        are remembered for _NEGATIVE_CACHE_TTL seconds, so bad names don't
+        repeatedly burn the rate-limited round trip.
+
         Args:
             location_name (str): Name of location (preferably in India)
-            
+
         Returns:
             tuple: (latitude, longitude) or None if not found
         """
         try:
-            # Check if a country is already specified in the location name
-            if not any(country in location_name.lower() for country in ['india', 'pakistan', 'bangladesh', 'nepal', 'bhutan', 'sri lanka', 'myanmar']):
-                # Prioritize Indian locations by appending India to the query
-                search_query = f"{location_name}, India"
-            else:
-                search_query = location_name
-            
-            # Try with more flexible geocoding parameters
-            location = self.geocode(
-                search_query,
-                exactly_one=True,
-                addressdetails=True,
-                namedetails=True,
-                language="en",
-                extratags=True,
-                country_codes="in"  # Limit to India
-            )
-                
-            if location:
-                logger.info(f"Geocoded {location_name} to {location.latitude}, {location.longitude}")
-                return (location.latitude, location.longitude)
-            else:
-                # Try without country specification if the first attempt fails
-                if search_query != location_name:
-                    location = self.geocode(
-                        location_name,
-                        exactly_one=True,
-                        addressdetails=True,
-                        namedetails=True,
-                        language="en"
-                    )
-                    if location:
-                        logger.info(f"Geocoded {location_name} to {location.latitude}, {location.longitude}")
-                        return (location.latitude, location.longitude)
-                
-                # Try with structured query if all else fails
-                parts = location_name.split()
-                if len(parts) > 1:
-                    # Try different combinations of the parts
-                    for i in range(len(parts)):
-                        city = parts[i]
-                        rest = " ".join(parts[:i] + parts[i+1:])
-                        structured_query = {
-                            "city": city,
-                            "country": "India",
-                            "state": rest
-                        }
-                        location = self.geocode(structured_query, exactly_one=True)
-                        if location:
-                            logger.info(f"Geocoded {location_name} to {location.latitude}, {location.longitude} using structured query")
-                            return (location.latitude, location.longitude)
-                
-                logger.warning(f"Could not geocode location: {location_name}")
+            normalized = location_name.strip().lower()
+
+            failed_at = self._negative_cache.get(normalized)
+            if failed_at is not None:
+                if time.monotonic() - failed_at < _NEGATIVE_CACHE_TTL:
+                    logger.info("Negative cache hit for %s", location_name)
+                    return None
+                del self._negative_cache[normalized]
+
+            try:
+                return self._geocode_cached(normalized)
+            except _GeocodeMiss:
+                # Prune expired entries once the negative cache gets large,
+                # so distinct bad names can't grow it without bound
+                if len(self._negative_cache) >= 4096:
+                    now = time.monotonic()
+                    self._negative_cache = {
+                        name: failed
+                        for name, failed in self._negative_cache.items()
+                        if now - failed < _NEGATIVE_CACHE_TTL
+                    }
+                self._negative_cache[normalized] = time.monotonic()
                 return None
         except Exception as e:
-            logger.error(f"Error geocoding {location_name}: {str(e)}")
+            logger.error("Error geocoding %s: %s", location_name, str(e))
             return None
-    
+
+    def _geocode_uncached(self, location_name):
+        """
+        Resolve a normalized location name via Nominatim (cache miss path)
+
+        Args:
+            location_name (str): Normalized location name
+
+        Returns:
+            tuple: (latitude, longitude)
+
+        Raises:
+            _GeocodeMiss: If no match was found, so the miss is not kept in
+                the positive lru_cache
+        """
+        # Check if a country is already specified in the location name
+        if not COUNTRY_RE.search(location_name):
+            # Prioritize Indian locations by appending India to the query
+            search_query = f"{location_name}, India"
+        else:
+            search_query = location_name
+
+        # Try with more flexible geocoding parameters
+        location = self.geocode(
+            search_query,
+            exactly_one=True,
+            addressdetails=True,
+            namedetails=True,
+            language="en",
+            extratags=True,
+            country_codes="in"  # Limit to India
+        )
+
+        if location:
+            logger.info("Geocoded %s to %s, %s", location_name, location.latitude, location.longitude)
+            return (location.latitude, location.longitude)
+        else:
+            # Fall back to one multi-candidate search ranked locally, instead
+            # of a fan-out of per-part structured queries that each pay the
+            # rate-limit delay
+            candidates = self.geocode(
+                location_name,
+                exactly_one=False,
+                limit=5,
+                addressdetails=True,
+                language="en"
+            )
+            if candidates:
+                best = next(
+                    (c for c in candidates if "india" in c.address.lower()),
+                    candidates[0]
+                )
+                logger.info("Geocoded %s to %s, %s from %s candidates", location_name, best.latitude, best.longitude, len(candidates))
+                return (best.latitude, best.longitude)
+
+            logger.warning("Could not geocode location: %s", location_name)
+            raise _GeocodeMiss(location_name)
+
     def create_buffer(self, lat, lon, distance_km):
         """
         Create a buffer around a point
@@ -115,29 +216,21 @@ class GISTools:
             shapely.geometry.Polygon: Buffer polygon
         """
         try:
-            # Create point and convert to UTM for accurate buffering
-            point = Point(lon, lat)
-            point_gdf = gpd.GeoDataFrame(geometry=[point], crs="EPSG:4326")
-            
-            # Convert to UTM projection (more accurate for distance calculations)
+            # Project into UTM for accurate buffering (cached transformers,
+            # no GeoDataFrame round-trip for a single point)
             utm_zone = int((lon + 180) / 6) + 1
-            utm_crs = f"EPSG:326{utm_zone}"  # Northern hemisphere
-            if lat < 0:
-                utm_crs = f"EPSG:327{utm_zone}"  # Southern hemisphere
-                
-            point_utm = point_gdf.to_crs(utm_crs)
-            
-            # Create buffer (distance in meters)
-            buffer_utm = point_utm.buffer(distance_km * 1000)
-            
-            # Convert back to WGS84
-            buffer_gdf = gpd.GeoDataFrame(geometry=buffer_utm, crs=utm_crs)
-            buffer_wgs84 = buffer_gdf.to_crs("EPSG:4326")
-            
-            logger.info(f"Created {distance_km}km buffer around {lat}, {lon}")
-            return buffer_wgs84.geometry[0]
+            forward, inverse = _utm_transformers(utm_zone, lat < 0)
+
+            x, y = forward.transform(lon, lat)
+
+            # Create buffer (distance in meters) and convert back to WGS84
+            buffer_utm = Point(x, y).buffer(distance_km * 1000)
+            buffer_wgs84 = transform(inverse.transform, buffer_utm)
+
+            logger.info("Created %skm buffer around %s, %s", distance_km, lat, lon)
+            return buffer_wgs84
         except Exception as e:
-            logger.error(f"Error creating buffer: {str(e)}")
+            logger.error("Error creating buffer: %s", str(e))
             return None
     
     def create_map(self, center_lat=20.5937, center_lon=78.9629, zoom=5):
@@ -153,12 +246,14 @@ class GISTools:
             folium.Map: Map object
         """
         try:
+            import folium
+
             m = folium.Map(location=[center_lat, center_lon], zoom_start=zoom,
                           tiles='OpenStreetMap')
             logger.info("Created map centered on India")
             return m
         except Exception as e:
-            logger.error(f"Error creating map: {str(e)}")
+            logger.error("Error creating map: %s", str(e))
             return None
     
     def load_geojson(self, file_path):
@@ -173,10 +268,10 @@ class GISTools:
         """
         try:
             gdf = gpd.read_file(file_path)
-            logger.info(f"Loaded GeoJSON from {file_path} with {len(gdf)} features")
+            logger.info("Loaded GeoJSON from %s with %s features", file_path, len(gdf))
             return gdf
         except Exception as e:
-            logger.error(f"Error loading GeoJSON {file_path}: {str(e)}")
+            logger.error("Error loading GeoJSON %s: %s", file_path, str(e))
             return None
     
     def spatial_intersection(self, gdf1, gdf2):
@@ -194,12 +289,33 @@ class GISTools:
             # Ensure both have same CRS
             if gdf1.crs != gdf2.crs:
                 gdf2 = gdf2.to_crs(gdf1.crs)
-                
-            result = gpd.overlay(gdf1, gdf2, how='intersection')
-            logger.info(f"Performed spatial intersection, resulting in {len(result)} features")
+
+            # Candidate pairs from the spatial index, then one vectorized
+            # intersection call instead of gpd.overlay's per-pair overhead
+            left = np.asarray(gdf1.geometry.values)
+            right = np.asarray(gdf2.geometry.values)
+            tree = shapely.STRtree(right)
+            i, j = tree.query(left, predicate='intersects')
+            geoms = shapely.intersection(left[i], right[j])
+
+            # Keep only pairs with a real overlap of the input dimension, so
+            # boundary-only touches don't surface as line/point artifacts
+            # (matching gpd.overlay's keep_geom_type default)
+            keep = ~shapely.is_empty(geoms)
+            keep &= shapely.get_dimensions(geoms) == shapely.get_dimensions(left[i])
+            i, j, geoms = i[keep], j[keep], geoms[keep]
+
+            # Carry the attribute columns of both frames, suffixing clashes
+            # like gpd.overlay does
+            attrs1 = gdf1.drop(columns=gdf1.geometry.name).iloc[i].reset_index(drop=True)
+            attrs2 = gdf2.drop(columns=gdf2.geometry.name).iloc[j].reset_index(drop=True)
+            attrs = attrs1.join(attrs2, lsuffix='_1', rsuffix='_2')
+
+            result = gpd.GeoDataFrame(attrs, geometry=geoms, crs=gdf1.crs)
+            logger.info("Performed spatial intersection, resulting in %s features", len(result))
             return result
         except Exception as e:
-            logger.error(f"Error performing spatial intersection: {str(e)}")
+            logger.error("Error performing spatial intersection: %s", str(e))
             return None
     
     def calculate_area(self, geometry, units='km2'):
@@ -216,23 +332,23 @@ class GISTools:
         try:
             if isinstance(geometry, gpd.GeoDataFrame):
                 # Convert to equal area projection for accurate area calculation
-                geometry_ea = geometry.to_crs('+proj=aea +lat_1=20 +lat_2=60 +lat_0=40 +lon_0=80 +x_0=0 +y_0=0 +ellps=WGS84 +datum=WGS84 +units=m +no_defs')
+                geometry_ea = geometry.to_crs(_area_crs())
                 area_m2 = geometry_ea.geometry.area.sum()
             else:
-                # Create a GeoDataFrame from the geometry
-                gdf = gpd.GeoDataFrame(geometry=[geometry], crs="EPSG:4326")
-                geometry_ea = gdf.to_crs('+proj=aea +lat_1=20 +lat_2=60 +lat_0=40 +lon_0=80 +x_0=0 +y_0=0 +ellps=WGS84 +datum=WGS84 +units=m +no_defs')
-                area_m2 = geometry_ea.geometry.area[0]
+                # Project the single geometry with the cached transformer and
+                # take its GEOS area directly; no GeoDataFrame round-trip
+                geometry_ea = transform(_area_transformer().transform, geometry)
+                area_m2 = geometry_ea.area
                 
             if units == 'km2':
                 area = area_m2 / 1_000_000  # Convert to km²
-                logger.info(f"Calculated area: {area:.2f} km²")
+                logger.info("Calculated area: %.2f km²", area)
                 return area
             else:
-                logger.info(f"Calculated area: {area_m2:.2f} m²")
+                logger.info("Calculated area: %.2f m²", area_m2)
                 return area_m2
         except Exception as e:
-            logger.error(f"Error calculating area: {str(e)}")
+            logger.error("Error calculating area: %s", str(e))
             return None
             
     def load_raster(self, file_path):
@@ -246,14 +362,16 @@ class GISTools:
             tuple: (data array, transform, metadata)
         """
         try:
+            import rasterio
+
             with rasterio.open(file_path) as src:
                 data = src.read(1)  # Read first band
                 transform = src.transform
                 meta = src.meta
-                logger.info(f"Loaded raster from {file_path}")
+                logger.info("Loaded raster from %s", file_path)
                 return data, transform, meta
         except Exception as e:
-            logger.error(f"Error loading raster {file_path}: {str(e)}")
+            logger.error("Error loading raster %s: %s", file_path, str(e))
             return None, None, None
             
     def find_nearest_features(self, point_gdf, polygon_gdf, k=5):
@@ -272,26 +390,23 @@ class GISTools:
             # Ensure same CRS
             if point_gdf.crs != polygon_gdf.crs:
                 polygon_gdf = polygon_gdf.to_crs(point_gdf.crs)
-                
-            # Build spatial index for polygons
-            spatial_index = polygon_gdf.sindex
-            
-            nearest_dict = {}
-            
-            for idx, point in point_gdf.iterrows():
-                # Find potential nearest polygons
-                possible_matches_index = list(spatial_index.nearest(point.geometry.bounds, k))
-                possible_matches = polygon_gdf.iloc[possible_matches_index]
-                
-                # Calculate distances
-                distances = possible_matches.distance(point.geometry)
-                
-                # Sort by distance
-                nearest_indices = distances.sort_values().index.tolist()[:k]
-                nearest_dict[idx] = nearest_indices
-                
-            logger.info(f"Found nearest features for {len(point_gdf)} points")
+
+            # Compute all point-polygon distances in one vectorized GEOS call
+            # instead of a per-point Python loop over the spatial index
+            points = np.asarray(point_gdf.geometry.values)
+            polygons = np.asarray(polygon_gdf.geometry.values)
+            distances = shapely.distance(points[:, np.newaxis], polygons[np.newaxis, :])
+
+            # k nearest polygons per point, ordered by distance
+            nearest_positions = np.argsort(distances, axis=1, kind="stable")[:, :k]
+
+            nearest_dict = {
+                idx: polygon_gdf.index[positions].tolist()
+                for idx, positions in zip(point_gdf.index, nearest_positions)
+            }
+
+            logger.info("Found nearest features for %s points", len(point_gdf))
             return nearest_dict
         except Exception as e:
-            logger.error(f"Error finding nearest features: {str(e)}")
+            logger.error("Error finding nearest features: %s", str(e))
             return None 
\ No newline at end of file